@@ -1,11 +1,11 @@
 import json
-import os
 
 class Configuration:
     CONFIG_FILE = 'config.json'
 
     def __init__(self, filename=None):
         self.filename = filename if filename else self.CONFIG_FILE
+        self._listeners = []
         self.config = {
             'ap': {
                 'ssid': 'ESP32-Captive-Portal',
@@ -53,6 +53,12 @@ class Configuration:
             print(f"[INFO] Configuration saved successfully to {self.filename}.")
         except Exception as e:
             print(f"[ERROR] Failed to save configuration: {e}")
+        for listener in self._listeners:
+            listener()
+
+    def register_listener(self, callback):
+        # Called with no arguments whenever the configuration is saved
+        self._listeners.append(callback)
 
     def save_default_config(self):
         self.save()
@@ -1,40 +1,72 @@
+import gc
 import socket
 import uasyncio as asyncio
+from micropython import const
 from utils import log_with_timestamp  # Updated import
 
+_DEBUG = const(0)  # Set to 1 to compile in per-query logging; each line costs UART time
+
+# Fixed DNS response fragments
+_DNS_FLAGS = b'\x81\x80'  # Standard response, recursion desired/available
+_EMPTY = b'\x00\x00\x00\x00'  # NSCOUNT and ARCOUNT
+# Name pointer to the question at offset 12, then A, IN, TTL 60, RDLENGTH 4
+_DNS_ANSWER_SUFFIX = b'\xc0\x0c\x00\x01\x00\x01\x00\x00\x00\x3c\x00\x04'
+
 class DNSQuery:
     def __init__(self, data):
-        self.data = data
+        self.data = memoryview(data)  # Slices below are views, not copies
         self.domain = ''
         self.parse_domain()
 
     def parse_domain(self):
         kind = (self.data[2] >> 3) & 15
         if kind == 0:
-            ini = 12
-            lon = self.data[ini]
-            while lon != 0:
-                self.domain += self.data[ini+1:ini+lon+1].decode('utf-8') + '.'
-                ini += lon + 1
-                lon = self.data[ini]
-        log_with_timestamp(f"[DEBUG] DNSQuery: Parsed domain: {self.domain}")
+            d = self.data
+            i = 12
+            parts = []
+            while True:
+                n = d[i]
+                if n == 0:
+                    break
+                i += 1
+                parts.append(str(d[i:i+n], 'utf-8'))
+                i += n
+            self.domain = '.'.join(parts)
+        if _DEBUG:
+            log_with_timestamp(f"[DEBUG] DNSQuery: Parsed domain: {self.domain}")
 
-    def response(self, ip):
-        packet = self.data[:2] + b'\x81\x80'
-        packet += self.data[4:6] + self.data[4:6] + b'\x00\x00\x00\x00'
-        packet += self.data[12:]
-        packet += b'\xc0\x0c'
-        packet += b'\x00\x01\x00\x01\x00\x00\x00\x3c\x00\x04'
-        packet += bytes(map(int, ip.split('.')))
+    def response(self, ans_tail):
+        # Fill a single buffer straight from the query view; the result is
+        # a bytearray so DNSServer can cache it and patch the ID in place
+        data = self.data
+        n = len(data)
+        packet = bytearray(n + len(ans_tail))
+        packet[0:2] = data[0:2]
+        packet[2:4] = _DNS_FLAGS
+        packet[4:6] = data[4:6]
+        packet[6:8] = data[4:6]  # Answer count mirrors the question count
+        packet[8:12] = _EMPTY
+        packet[12:n] = data[12:]
+        packet[n:] = ans_tail
         return packet
 
 class DNSServer:
+    CACHE_SIZE = 32
+
     def __init__(self, ip):
         self.ip = ip
+        # The answer record never changes, so pack it once up front
+        self._ip_bytes = bytes(int(x) for x in ip.split('.'))
+        self._ans_tail = _DNS_ANSWER_SUFFIX + self._ip_bytes
+        self._cache = {}
+        self._reply_count = 0
         self.socket = None
         self.running = False
 
     async def start(self):
+        if self.running:
+            log_with_timestamp("[INFO] DNS Server: Already running")
+            return
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.setblocking(False)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -42,23 +74,55 @@ class DNSServer:
             self.socket.bind(('0.0.0.0', 53))
             log_with_timestamp("[INFO] DNS Server: Started on port 53")
             self.running = True
+            # Hoist per-packet attribute lookups out of the receive loop
+            sock = self.socket
+            queue_read = asyncio.core._io_queue.queue_read
+            recvfrom = sock.recvfrom
+            sendto = sock.sendto
+            cache = self._cache
             while self.running:
                 try:
-                    yield asyncio.core._io_queue.queue_read(self.socket)
-                    data, addr = self.socket.recvfrom(512)
+                    yield queue_read(sock)
+                    data, addr = recvfrom(512)
                     if data:
-                        log_with_timestamp(f"[DEBUG] DNS Server: Received request from {addr}")
-                        request = DNSQuery(data)
-                        response = request.response(self.ip)
-                        self.socket.sendto(response, addr)
-                        log_with_timestamp(f"[INFO] DNS Server: Responded {request.domain} -> {self.ip}")
-                    await asyncio.sleep_ms(1)  # Cooperative yield
+                        if _DEBUG:
+                            log_with_timestamp(f"[DEBUG] DNS Server: Received request from {addr}")
+                        # Every name resolves to us, so the reply only depends on
+                        # the counts and question; cache it and patch in the new
+                        # transaction ID so a hit allocates nothing
+                        key = data[4:]
+                        response = cache.get(key)
+                        if response is not None:
+                            response[0] = data[0]
+                            response[1] = data[1]
+                            sendto(response, addr)
+                        else:
+                            try:
+                                request = DNSQuery(data)
+                                response = request.response(self._ans_tail)
+                            except Exception as e:
+                                # Drop malformed queries without disturbing the loop
+                                if _DEBUG:
+                                    log_with_timestamp(f"[DEBUG] DNS Server: Dropped malformed query from {addr}: {e}")
+                                continue
+                            sendto(response, addr)
+                            if len(cache) >= self.CACHE_SIZE:
+                                cache.clear()
+                            cache[key] = response
+                            if _DEBUG:
+                                log_with_timestamp(f"[INFO] DNS Server: Responded {request.domain} -> {self.ip}")
+                        # Collect on our schedule, right after a reply, rather than
+                        # letting an automatic collection land between recv and send
+                        self._reply_count += 1
+                        if (self._reply_count & 31) == 0:
+                            gc.collect()
                 except asyncio.CancelledError:
                     log_with_timestamp("[INFO] DNS Server: Received cancellation signal")
                     break
                 except Exception as e:
+                    # Socket errors, or a MemoryError from recvfrom or the cache on a
+                    # tight heap, cost this one packet; keep serving the next
                     log_with_timestamp(f"[ERROR] DNS Server: {e}")
-                await asyncio.sleep_ms(1)  # Cooperative yield
         except Exception as e:
             log_with_timestamp(f"[ERROR] DNS Server: Failed to start: {e}")
         finally:
@@ -71,4 +135,5 @@ class DNSServer:
                 self.socket.close()
             except Exception as e:
                 log_with_timestamp(f"[ERROR] DNS Server: Error closing socket: {e}")
+        self._cache.clear()  # Release cached replies while the server is down
         log_with_timestamp("[INFO] DNS Server: Stopped")
\ No newline at end of file
@@ -1,5 +1,7 @@
 import uasyncio as asyncio
-import ujson
+import errno
+import os
+from micropython import const
 from utils import log_with_timestamp  # Updated import
 import json
 
@@ -9,11 +11,25 @@ except ImportError:
     print("[WARNING] ssl module not available, falling back to non-TLS mode")
     ssl = None
 
+_DEBUG = const(0)  # Set to 1 to compile in per-request debug logging
+
+# Built once at import instead of per request
+_DETECTION_PATHS = ('/hotspot-detect.html', '/generate_204', '/ncsi.txt')
+_CAPTIVE_PORTAL_PATHS = (
+    '/generate_204',
+    '/hotspot-detect.html',
+    '/connecttest.txt',
+    '/redirect',
+    '/success.txt',
+    '/ncsi.txt',
+)
+
 def join_path(*args):
     return '/'.join(arg.strip('/') for arg in args)
 
 def url_decode(s):
-    log_with_timestamp(f"[DEBUG] url_decode input: {s}")
+    if _DEBUG:
+        log_with_timestamp(f"[DEBUG] url_decode input: {s}")
     result = ''
     i = 0
     while i < len(s):
@@ -28,7 +44,8 @@ def url_decode(s):
             result += s[i]
             i += 1
     result = result.replace('+', ' ')
-    log_with_timestamp(f"[DEBUG] url_decode output: {result}")
+    if _DEBUG:
+        log_with_timestamp(f"[DEBUG] url_decode output: {result}")
     return result
 
 class HTTPServer:
@@ -44,6 +61,9 @@ class HTTPServer:
         self.running = False
         self.max_concurrent_requests = 5
         self.current_requests = 0
+        self.stop_event = asyncio.Event()
+        self._file_buf = bytearray(512)
+        self._detection_responses = {}
 
     def check_tls_files(self):
         try:
@@ -57,13 +77,21 @@ class HTTPServer:
             return False
 
     async def start(self):
-        print(f"[DEBUG] HTTP(S) Server: Starting on HTTP ports {self.ports} and HTTPS ports {self.ssl_ports}")
+        if self.servers:
+            print("[INFO] HTTP(S) Server: Already running")
+            return
+        self.stop_event.clear()
+        if _DEBUG:
+            print(f"[DEBUG] HTTP(S) Server: Starting on HTTP ports {self.ports} and HTTPS ports {self.ssl_ports}")
         try:
             # Start non-SSL servers
             for port in self.ports:
-                server = await asyncio.start_server(self.handle_request, "0.0.0.0", port)
+                server = await self.bind_server(port)
                 self.servers.append(server)
                 print(f"[INFO] HTTP Server: Started on port {port}")
+                if self.stop_event.is_set():
+                    await self.stop()  # Stopped while binding; close what was bound since
+                    return
 
             # Start SSL servers if TLS is available
             if self.use_tls:
@@ -71,22 +99,35 @@ class HTTPServer:
                 try:
                     context.load_cert_chain(self.ssl_certfile, self.ssl_keyfile)
                     for port in self.ssl_ports:
-                        ssl_server = await asyncio.start_server(self.handle_request, "0.0.0.0", port, ssl=context)
+                        ssl_server = await self.bind_server(port, ssl=context)
                         self.servers.append(ssl_server)
                         print(f"[INFO] HTTPS Server: Started on port {port}")
+                        if self.stop_event.is_set():
+                            await self.stop()  # Stopped while binding; close what was bound since
+                            return
                 except Exception as e:
                     print(f"[ERROR] Failed to load TLS cert/key: {e}")
                     print("[WARNING] Falling back to HTTP only")
                     self.use_tls = False
 
             self.running = True
-            while self.running:
-                await asyncio.sleep(1)  # Cooperative yield
+            await self.stop_event.wait()  # Idle without waking until stop() is called
         except Exception as e:
             print(f"[ERROR] HTTP(S) Server: Failed to start: {e}")
-            self.running = False
+            await self.stop()  # Release any ports bound before the failure
+
+    async def bind_server(self, port, **kwargs):
+        # Retry briefly if a just-closed listener hasn't released the port yet
+        for backoff in (0, 100, 200, 400, 800):
+            await asyncio.sleep_ms(backoff)
+            try:
+                return await asyncio.start_server(self.handle_request, "0.0.0.0", port, **kwargs)
+            except OSError as e:
+                if e.args[0] != errno.EADDRINUSE or backoff == 800:
+                    raise
 
     async def stop(self):
+        self.stop_event.set()
         for server in self.servers:
             server.close()
             await server.wait_closed()
@@ -97,7 +138,6 @@ class HTTPServer:
     async def restart(self):
         print("[INFO] HTTP(S) Server: Restarting...")
         await self.stop()
-        await asyncio.sleep(1)  # Give a short delay before restarting
         await self.start()
         print("[INFO] HTTP(S) Server: Restarted successfully")
 
@@ -119,24 +159,28 @@ class HTTPServer:
         return None, "0.0.0.0"
 
     async def handle_request(self, reader, writer):
-        log_with_timestamp("[DEBUG] HTTP(S) Server: Handling new request")
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] HTTP(S) Server: Handling new request")
         try:
             request_line = await reader.readline()
-            log_with_timestamp(f"[DEBUG] HTTP(S) Server: Received request: {request_line}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] HTTP(S) Server: Received request: {request_line}")
             
             method, path, version = request_line.decode().strip().split(' ', 2)
-            log_with_timestamp(f"[DEBUG] Parsed request - Method: {method}, Path: {path}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Parsed request - Method: {method}, Path: {path}")
             
             client_address = writer.get_extra_info('peername')[0]
             client_interface, server_ip = self.get_client_interface(client_address)
             
-            log_with_timestamp(f"[DEBUG] Client connected via {client_interface} interface")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Client connected via {client_interface} interface")
 
             if path == '/scan':
                 await self.handle_scan_request(writer)
             elif path == '/connect' and method == 'POST':
                 await self.handle_connect_request(reader, writer)
-            elif path in ['/hotspot-detect.html', '/generate_204', '/ncsi.txt']:
+            elif path in _DETECTION_PATHS:
                 await self.handle_captive_portal_detection(writer, server_ip)
             elif path == '/index.html' or path == '/':
                 await self.serve_file(writer, 'index.html')
@@ -150,18 +194,11 @@ class HTTPServer:
             await writer.drain()
             writer.close()
             await writer.wait_closed()
-            log_with_timestamp("[DEBUG] HTTP(S) Server: Connection closed")
+            if _DEBUG:
+                log_with_timestamp("[DEBUG] HTTP(S) Server: Connection closed")
 
     def is_captive_portal_request(self, path):
-        captive_portal_paths = [
-            '/generate_204',
-            '/hotspot-detect.html',
-            '/connecttest.txt',
-            '/redirect',
-            '/success.txt',
-            '/ncsi.txt',
-        ]
-        return path in captive_portal_paths
+        return path in _CAPTIVE_PORTAL_PATHS
 
     async def captive_portal_redirect(self, writer, server_ip):
         port = self.ports[0] if self.ports else 80
@@ -169,30 +206,44 @@ class HTTPServer:
         response = f"HTTP/1.1 307 Temporary Redirect\r\nLocation: {location}\r\nCache-Control: no-cache\r\n\r\n"
         writer.write(response.encode())
         await writer.drain()
-        log_with_timestamp(f"[DEBUG] Captive Portal: Redirected to: {location}")
+        if _DEBUG:
+            log_with_timestamp(f"[DEBUG] Captive Portal: Redirected to: {location}")
 
     async def serve_file(self, writer, path):
         try:
             full_path = join_path(self.root_directory, path)
-            log_with_timestamp(f"[DEBUG] Attempting to serve file: {full_path}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Attempting to serve file: {full_path}")
             
             try:
-                with open(full_path, "rb") as file:
-                    content = file.read()
+                size = os.stat(full_path)[6]
+                file = open(full_path, "rb")
             except OSError:
                 log_with_timestamp(f"[ERROR] File not found: {full_path}")
                 response = f"HTTP/1.0 404 Not Found\r\n\r\nFile not found: {path}"
                 writer.write(response.encode('utf-8'))
                 return
 
-            writer.write(b"HTTP/1.0 200 OK\r\n")
-            content_type = self.get_content_type(path)
-            writer.write(f"Content-Type: {content_type}\r\n".encode('utf-8'))
-            writer.write(f"Content-Length: {len(content)}\r\n".encode('utf-8'))
-            writer.write(b"Cache-Control: no-cache\r\n")
-            writer.write(b"\r\n")
-            writer.write(content)
-            log_with_timestamp(f"[DEBUG] File served successfully: {full_path}")
+            try:
+                writer.write(b"HTTP/1.0 200 OK\r\n")
+                content_type = self.get_content_type(path)
+                writer.write(f"Content-Type: {content_type}\r\n".encode('utf-8'))
+                writer.write(f"Content-Length: {size}\r\n".encode('utf-8'))
+                writer.write(b"Cache-Control: no-cache\r\n")
+                writer.write(b"\r\n")
+                # Stream the file through a reusable buffer instead of reading it whole
+                buf = self._file_buf
+                mv = memoryview(buf)
+                while True:
+                    n = file.readinto(buf)
+                    if not n:
+                        break
+                    writer.write(mv[:n])
+                    await writer.drain()
+            finally:
+                file.close()
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] File served successfully: {full_path}")
         except Exception as e:
             log_with_timestamp(f"[ERROR] Failed to serve file {path}: {e}")
             response = f"HTTP/1.0 500 Internal Server Error\r\n\r\nError serving file: {path}"
@@ -210,14 +261,15 @@ class HTTPServer:
             return 'text/plain'
 
     async def handle_scan_request(self, writer):
-        log_with_timestamp("[DEBUG] Handling scan request")
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] Handling scan request")
         sta_interface = self.interface_manager.get_interface('sta')
         if sta_interface:
             try:
                 networks = await sta_interface.scan_networks()
-                log_with_timestamp(f"[DEBUG] Scanned networks: {networks}")
-                response = json.dumps({"networks": networks})
-                writer.write(f"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n{response}".encode())
+                # Write headers and body separately rather than copying the JSON into one string
+                writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\n\r\n")
+                writer.write(json.dumps({"networks": networks}).encode())
             except Exception as e:
                 log_with_timestamp(f"[ERROR] Failed to scan networks: {e}")
                 writer.write(b"HTTP/1.0 500 Internal Server Error\r\n\r\nFailed to scan networks")
@@ -225,12 +277,10 @@ class HTTPServer:
             log_with_timestamp("[ERROR] STA interface not available for scanning")
             writer.write(b"HTTP/1.0 500 Internal Server Error\r\n\r\nSTA interface not available")
         await writer.drain()
-        writer.close()
-        await writer.wait_closed()
 
-    
     async def handle_connect_request(self, reader, writer):
-        log_with_timestamp("[DEBUG] Handling connect request")
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] Handling connect request")
         response = "Internal Server Error"
         try:
             content_length = 0
@@ -245,24 +295,28 @@ class HTTPServer:
 
             body = await reader.read(content_length)
             data = body.decode('utf-8')
-            log_with_timestamp(f"[DEBUG] Raw request body: {data}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Raw request body: {data}")
             
             params = {}
             for param in data.split('&'):
                 key, value = param.split('=')
                 params[key] = value
-                log_with_timestamp(f"[DEBUG] Raw parameter: {key} = {value}")
+                if _DEBUG:
+                    log_with_timestamp(f"[DEBUG] Raw parameter: {key} = {value}")
 
             ssid_raw = params.get('ssid', '')
             password_raw = params.get('password', '')
-            log_with_timestamp(f"[DEBUG] Raw SSID: {ssid_raw}")
-            log_with_timestamp(f"[DEBUG] Raw password: {password_raw}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Raw SSID: {ssid_raw}")
+                log_with_timestamp(f"[DEBUG] Raw password: {password_raw}")
 
             ssid = url_decode(ssid_raw)
             password = url_decode(password_raw)
 
-            log_with_timestamp(f"[DEBUG] Decoded SSID: '{ssid}'")
-            log_with_timestamp(f"[DEBUG] Decoded password: '{password}'")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Decoded SSID: '{ssid}'")
+                log_with_timestamp(f"[DEBUG] Decoded password: '{password}'")
 
             if ssid and password:
                 sta_interface = self.interface_manager.get_interface('sta')
@@ -272,6 +326,9 @@ class HTTPServer:
                     else:
                         success = await sta_interface.connect(ssid, password)
                         if success:
+                            # Persist the working credentials; update() edits the STA config dict
+                            # in place, so reconnect() picks them up too
+                            self.interface_manager.config.update({'sta': {'ssid': ssid, 'password': password}})
                             # Get the IP address after successful connection
                             ip_address = sta_interface.get_ip()
                             response = f"Connected successfully to '{ssid}' with IP: {ip_address}"
@@ -297,13 +354,26 @@ class HTTPServer:
                 await writer.wait_closed()
             except Exception as e:
                 log_with_timestamp(f"[ERROR] Failed to close writer: {e}")
-            log_with_timestamp(f"[DEBUG] Connect response sent: {response}")
+            if _DEBUG:
+                log_with_timestamp(f"[DEBUG] Connect response sent: {response}")
 
     def is_running(self):
         return self.running
 
     async def handle_captive_portal_detection(self, writer, server_ip):
-        log_with_timestamp("[DEBUG] Handling captive portal detection request")
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] Handling captive portal detection request")
+        # OS probes hit this constantly, so build each response once per server IP
+        response = self._detection_responses.get(server_ip)
+        if response is None:
+            response = self.build_detection_response(server_ip)
+            self._detection_responses[server_ip] = response
+        writer.write(response)
+        await writer.drain()
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] Captive portal detection response sent")
+
+    def build_detection_response(self, server_ip):
         content = f"""
         <!DOCTYPE html>
         <html>
@@ -317,6 +387,4 @@ class HTTPServer:
         </html>
         """
         response = f"HTTP/1.0 200 OK\r\nContent-Type: text/html\r\nContent-Length: {len(content)}\r\n\r\n{content}"
-        writer.write(response.encode())
-        await writer.drain()
-        log_with_timestamp("[DEBUG] Captive portal detection response sent")
\ No newline at end of file
+        return response.encode()
\ No newline at end of file
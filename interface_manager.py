@@ -1,8 +1,11 @@
 import uasyncio as asyncio
 from network_interface import NetworkInterface
 import time
+from micropython import const
 from utils import log_with_timestamp  # Updated import
 
+_DEBUG = const(0)  # Set to 1 to compile in debug logging
+
 class InterfaceManager:
     def __init__(self, config):
         self.config = config
@@ -10,9 +13,15 @@ class InterfaceManager:
         self.sta_configured = False
         self.last_sta_config_attempt = 0
         self.auto_reconnect_enabled = True
+        self.ready = asyncio.Event()  # Set once any interface has started
+        self.config_changed = asyncio.Event()
+        config.register_listener(self.config_changed.set)
 
     async def start_interface(self, interface_type):
+        if interface_type in self.interfaces:
+            return True
         max_retries = 3
+        delay = 500
         for attempt in range(max_retries):
             if interface_type not in self.interfaces:
                 if interface_type == 'ap':
@@ -31,6 +40,7 @@ class InterfaceManager:
                     interface = NetworkInterface(interface_type, interface_config)
                     if await interface.start():
                         self.interfaces[interface_type] = interface
+                        self.ready.set()
                         log_with_timestamp(f"[INFO] {interface_type.upper()} interface started successfully")
                         if interface_type == 'sta':
                             await self.configure_sta_ip()
@@ -39,7 +49,9 @@ class InterfaceManager:
                         log_with_timestamp(f"[ERROR] Failed to start {interface_type.upper()} interface, attempt {attempt + 1}/{max_retries}")
                 except Exception as e:
                     log_with_timestamp(f"[ERROR] Exception while starting {interface_type.upper()} interface: {e}")
-                await asyncio.sleep(2)  # Wait before retrying
+                if attempt + 1 < max_retries:
+                    await asyncio.sleep_ms(delay)  # Back off before retrying
+                    delay *= 2
         return False
 
     async def stop_interface(self, interface_type):
@@ -89,20 +101,40 @@ class InterfaceManager:
         self.auto_reconnect_enabled = True
         log_with_timestamp("[INFO] Auto-reconnect enabled")
 
+    async def reset_interface(self, interface_type):
+        log_with_timestamp(f"[INFO] Resetting {interface_type.upper()} interface")
+        await self.stop_interface(interface_type)
+        await asyncio.sleep(1)
+        return await self.start_interface(interface_type)
+
     async def manage_interfaces(self):
         log_with_timestamp("[INFO] Starting interface management")
         while True:
-            for interface_type in list(self.interfaces.keys()):
-                interface = self.interfaces[interface_type]
-                if not interface.is_connected():
-                    log_with_timestamp(f"[WARNING] {interface_type.upper()} disconnected. Attempting to reconnect...")
-                    await self.stop_interface(interface_type)
+            # Check every 60 seconds, or straight away when the configuration changes
+            try:
+                await asyncio.wait_for(self.config_changed.wait(), 60)
+            except asyncio.TimeoutError:
+                pass
+            self.config_changed.clear()
+            if not self.auto_reconnect_enabled:
+                continue
+            for interface_type in ('ap', 'sta'):
+                interface = self.interfaces.get(interface_type)
+                if interface is None:
+                    log_with_timestamp(f"[WARNING] {interface_type.upper()} interface not available. Attempting to start it...")
                     await self.start_interface(interface_type)
-                elif interface_type == 'sta' and not self.sta_configured:
-                    await self.configure_sta_ip()
-                await asyncio.sleep_ms(1)  # Cooperative yield
-            await asyncio.sleep(60)  # Check every 60 seconds
-            log_with_timestamp("[DEBUG] Interface management cycle completed")
+                elif interface.is_connected():
+                    if interface_type == 'sta' and not self.sta_configured:
+                        await self.configure_sta_ip()
+                elif interface.is_connecting():
+                    continue
+                elif interface_type == 'sta' and not interface.config.get('ssid'):
+                    continue  # Nothing to reconnect to yet
+                else:
+                    log_with_timestamp(f"[WARNING] {interface_type.upper()} disconnected. Attempting to reset and reconnect...")
+                    await self.reset_interface(interface_type)
+            if _DEBUG:
+                log_with_timestamp("[DEBUG] Interface management cycle completed")
 
     async def stop_all_interfaces(self):
         for interface_type in list(self.interfaces.keys()):
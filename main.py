@@ -5,7 +5,6 @@ from dns_server import DNSServer
 from http_server import HTTPServer
 from interface_manager import InterfaceManager
 from configuration import Configuration
-import utime
 
 class CaptivePortal:
     def __init__(self):
@@ -22,39 +21,43 @@ class CaptivePortal:
         self.dns_server = DNSServer(self.server_ip)
         self.stop_event = asyncio.Event()
 
-    async def reset_sta_interface(self):
-        log_with_timestamp("[INFO] Resetting STA interface")
-        await self.interface_manager.stop_interface('sta')
-        await asyncio.sleep(1)
-        await self.interface_manager.start_interface('sta')
+    async def start_interfaces(self):
+        # Bring both interfaces up together; start-up waits for the slower, not both
+        await asyncio.gather(
+            self.interface_manager.start_interface("ap"),
+            self.interface_manager.start_interface("sta"),
+        )
+        self.interface_manager.ready.set()  # Also wake start() if every attempt failed
 
     async def start(self):
         log_with_timestamp("[INFO] CaptivePortal: Starting interfaces")
-        await asyncio.sleep(2)  # Add a small delay before starting services
-        ap_started = await self.interface_manager.start_interface("ap")
-        sta_started = await self.interface_manager.start_interface("sta")
+        interfaces_task = asyncio.create_task(self.start_interfaces())
 
-        if not ap_started and not sta_started:
+        # Start serving as soon as the first interface is up instead of
+        # waiting for the other one (e.g. a slow STA join) to finish
+        await self.interface_manager.ready.wait()
+        if not self.interface_manager.interfaces:
             print("[ERROR] Failed to start any interface. Shutting down.")
             return
 
         dns_task = asyncio.create_task(self.dns_server.start())
         http_task = asyncio.create_task(self.http_server.start())
-        interface_management_task = asyncio.create_task(self.manage_interfaces())
         
         print("[INFO] CaptivePortal: Services started successfully.")
         
         try:
+            # Only supervise interfaces once the initial bring-up has finished
+            await interfaces_task
+            interface_management_task = asyncio.create_task(self.interface_manager.manage_interfaces())
             await asyncio.gather(dns_task, http_task, interface_management_task)
         except asyncio.CancelledError:
             print("[INFO] CaptivePortal: Shutting down...")
-        finally:
-            await self.shutdown()
 
     async def shutdown(self):
         print("[INFO] CaptivePortal: Initiating shutdown...")
-        await self.interface_manager.stop_all_interfaces()
         await self.http_server.stop()
+        await self.dns_server.stop()
+        await self.interface_manager.stop_all_interfaces()
         print("[INFO] CaptivePortal: Shutdown complete")
 
     async def reset_device(self):
@@ -62,18 +65,6 @@ class CaptivePortal:
         await asyncio.sleep(1)  # Give some time for the message to be printed
         machine.reset()
 
-    async def manage_interfaces(self):
-        while True:
-            await asyncio.sleep(60)  # Check every 60 seconds
-            sta_interface = self.interface_manager.get_interface('sta')
-            if sta_interface:
-                if not sta_interface.is_connected() and not sta_interface.is_connecting():
-                    log_with_timestamp("[WARNING] STA disconnected. Attempting to reset and reconnect...")
-                    await self.reset_sta_interface()
-            else:
-                log_with_timestamp("[WARNING] STA interface not available. Attempting to start it...")
-                await self.interface_manager.start_interface('sta')
-
 async def main():
     captive_portal = CaptivePortal()
     try:
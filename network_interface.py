@@ -1,24 +1,40 @@
 import network
 import uasyncio as asyncio
-import time
 import utime
+from micropython import const
 from utils import log_with_timestamp  # Updated import
 
+_DEBUG = const(0)  # Set to 1 to compile in debug logging
+
+# Bind network module constants once at import
+_AP_IF = network.AP_IF
+_STA_IF = network.STA_IF
+_STAT_GOT_IP = network.STAT_GOT_IP
+# Not every port defines this status, so fall back to a value status() never returns
+_STAT_WRONG_PASSWORD = getattr(network, 'STAT_WRONG_PASSWORD', None)
+
 class NetworkInterface:
     def __init__(self, interface_type, config):
         self.type = interface_type
         self.config = config
         self.interface = None
         self.connecting = False  # Add this line
+        self._scan_cache = None
+        self._scan_ts = 0
+        self.scan_details = {}  # SSID -> (rssi, channel, authmode) from the last scan
 
     async def start(self):
         log_with_timestamp(f"Starting {self.type} interface...")
         if self.type == "ap":
-            self.interface = network.WLAN(network.AP_IF)
+            self.interface = network.WLAN(_AP_IF)
             self.interface.active(True)
+            # active(True) is synchronous, so one check is enough
+            if not self.interface.active():
+                log_with_timestamp("[ERROR] AP interface failed to activate")
+                return False
             self.interface.config(essid=self.config['ssid'], password=self.config['password'])
         elif self.type == "sta":
-            self.interface = network.WLAN(network.STA_IF)
+            self.interface = network.WLAN(_STA_IF)
             self.interface.active(True)
             if self.config['ssid']:
                 return await self.connect(self.config['ssid'], self.config['password'])
@@ -35,28 +51,59 @@ class NetworkInterface:
         log_with_timestamp(f"[INFO] Attempting to connect to '{ssid}'")
         self.connecting = True  # Set the flag
         try:
+            # Yield around the driver call so the DNS/HTTP tasks get a slot
+            await asyncio.sleep_ms(0)
             self.interface.connect(ssid, password)
-            start_time = utime.time()
-            while not self.interface.isconnected():
-                if utime.time() - start_time > 30:  # 30 second timeout
-                    log_with_timestamp(f"[ERROR] Failed to connect to '{ssid}' after 30 seconds")
-                    log_with_timestamp(f"[DEBUG] Connection status: {self.interface.status()}")
-                    self.connecting = False  # Reset the flag
-                    return False
-                log_with_timestamp(f"[DEBUG] Waiting for connection... Time elapsed: {utime.time() - start_time}s")
-                log_with_timestamp(f"[DEBUG] Connection status: {self.interface.status()}")
-                await asyncio.sleep(1)
-            
-            log_with_timestamp(f"[INFO] Connected to '{ssid}'. IP: {self.get_ip()}")
-            self.connecting = False  # Reset the flag
+            await asyncio.sleep_ms(0)
+            if not await self._wait_connected(30000):  # 30 second timeout
+                status = self.interface.status()
+                log_with_timestamp(f"[ERROR] Failed to connect to '{ssid}' (status: {status})")
+                return False
+
+            # Query the driver once and emit a single summary line
+            ip, _, gateway, _ = self.interface.ifconfig()
+            log_with_timestamp(f"[INFO] Connected to '{ssid}'. IP: {ip}, gateway: {gateway}")
             return True
         except Exception as e:
             log_with_timestamp(f"[ERROR] Exception while connecting to '{ssid}': {e}")
-            self.connecting = False  # Reset the flag
             return False
+        finally:
+            self.connecting = False  # Reset the flag, including on cancellation
+
+    async def _wait_connected(self, timeout_ms=20000):
+        # Poll with exponential backoff (100 ms doubling up to 500 ms) so a fast
+        # association is noticed quickly while a slow one isn't polled hard.
+        # Bind the lookups used on every poll to locals
+        ticks_ms = utime.ticks_ms
+        ticks_diff = utime.ticks_diff
+        get_status = self.interface.status
+        got_ip = _STAT_GOT_IP
+        wrong_password = _STAT_WRONG_PASSWORD
+        deadline = utime.ticks_add(ticks_ms(), timeout_ms)
+        delay = 100
+        last_status = None
+        while ticks_diff(deadline, ticks_ms()) > 0:
+            status = get_status()  # One driver query per poll, same check as is_connected()
+            if status == got_ip:
+                return True
+            if _DEBUG and status != last_status:
+                # Log transitions only, not every poll
+                log_with_timestamp(f"[DEBUG] Connection status: {status}")
+                last_status = status
+            if status == wrong_password:
+                return False  # The driver won't recover from this; don't wait out the timeout
+            await asyncio.sleep_ms(delay)
+            delay = min(delay * 2, 500)
+        return self.is_connected()
 
     def is_connected(self):
-        return self.interface and self.interface.isconnected()
+        if not self.interface:
+            return False
+        if self.type == "ap":
+            # isconnected() on an AP only reports whether a station has joined
+            return self.interface.active()
+        # isconnected() can report True once a static IP is set, before association
+        return self.interface.status() == _STAT_GOT_IP
 
     def get_ip(self):
         if self.is_connected():
@@ -64,16 +111,40 @@ class NetworkInterface:
         return None
 
     async def scan_networks(self):
-        log_with_timestamp("[DEBUG] Performing network scan")
+        if _DEBUG:
+            log_with_timestamp("[DEBUG] Performing network scan")
         if self.type != "sta":
             log_with_timestamp("[ERROR] Scan method is only available for STA interface")
             return []
         
-        self.interface.active(True)
+        # Repeated scans disrupt the AP, so serve recent results from cache
+        if self._scan_cache is not None and utime.ticks_diff(utime.ticks_ms(), self._scan_ts) < 5000:
+            return self._scan_cache
+
+        if not self.interface.active():
+            self.interface.active(True)
         try:
+            # scan() blocks for the whole channel sweep; let other tasks run
+            # right before and after it
+            await asyncio.sleep_ms(0)
             networks = self.interface.scan()
-            log_with_timestamp(f"[DEBUG] Scan result: {networks}")
-            return [net[0].decode('utf-8') for net in networks if net[0]]  # Only return non-empty SSIDs
+            await asyncio.sleep_ms(0)
+            # Keep one entry per non-empty SSID: the access point with the strongest signal
+            # Dedupe on the raw bytes and only decode the survivors
+            best = {}
+            for net in networks:
+                ssid = net[0]
+                if not ssid:
+                    continue
+                rssi = net[3]
+                prev = best.get(ssid)
+                if prev is None or rssi > prev[0]:
+                    best[ssid] = (rssi, net[2], net[4])  # rssi, channel, authmode
+            details = {ssid.decode('utf-8'): info for ssid, info in best.items()}
+            self.scan_details = details
+            self._scan_cache = sorted(details, key=lambda ssid: details[ssid][0], reverse=True)
+            self._scan_ts = utime.ticks_ms()
+            return self._scan_cache
         except Exception as e:
             log_with_timestamp(f"[ERROR] Scan failed: {e}")
             return []
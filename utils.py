@@ -1,5 +1,4 @@
 import utime
 
 def log_with_timestamp(message):
-    timestamp = utime.ticks_ms()
-    print(f"[{timestamp}] {message}")
\ No newline at end of file
+    print("[", utime.ticks_ms(), "] ", message, sep="")